@@ -0,0 +1,190 @@
+# imports
+import argparse
+import csv
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import position_functions
+import star_collection
+
+results_columns = ['frame', 'xz', 'yz', 'chisq', 'iterations', 'nfev', 'seconds', 'error', 'settings']
+default_results_name = 'zenith_results.csv'
+
+def find_frames(directory, pattern='*.csv', exclude=(default_results_name,)):
+    """
+    frames (star catalogs measured on each image) in a capture directory and its subdirectories
+
+    params
+    ------
+    directory : str, e.g. a nightly capture directory like 20220620/
+    pattern : str, glob pattern of the frame files
+    exclude : file names to skip (the results table lives in the same directory by default)
+
+    output
+    ------
+    sorted list of paths
+    """
+    paths = glob.glob(os.path.join(directory, '**', pattern), recursive=True)
+    return sorted(p for p in paths if os.path.basename(p) not in exclude)
+
+def frame_time(path):
+    """
+    utc time encoded in a frame's file name as YYYYMMDD[T_-]HHMMSS, or None
+    """
+    match = re.search(r'(\d{8})[T_-]?(\d{6})', os.path.basename(path))
+    if match is None:
+        return None
+    return datetime.datetime.strptime(''.join(match.groups()), '%Y%m%d%H%M%S')
+
+def settings_key(bounds, method='quadrant', tol=None, max_iter=None, site=None):
+    """
+    short hash of the solve settings, stored with every result so a rerun with other settings
+    doesn't take rows solved under the old ones as finished
+    """
+    settings = {'bounds': [float(b) for b in bounds], 'method': method, 'tol': tol, 'max_iter': max_iter,
+                'site': None if site is None else [float(c) for c in site]}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+
+def solve_frame(path, bounds, method='quadrant', tol=None, max_iter=None, site=None):
+    """
+    find the zenith of one frame without any plotting (runs in the worker processes)
+
+    params
+    ------
+    path : str, the frame's star catalog
+    bounds : (x1, x2, y1, y2), the image area to search
+    method, tol, max_iter : passed on to position_functions.zenith_finder
+    site : (lat, lon), observer position; when given, frames with a time in their name are fitted
+        with the stars' alt/az at that time
+
+    output
+    ------
+    dict with the results_columns of the frame
+    """
+    start = time.perf_counter()
+    try:
+        stars = star_collection.load_catalog(path, cache=False, validate=False)
+        when = frame_time(path) if site is not None else None
+        result = position_functions.zenith_finder(position_functions.area(*bounds), visualise=False, stars=stars,
+                                                  tol=tol, max_iter=max_iter, method=method, time=when, site=site)
+        row = {'xz': result.zenith[0], 'yz': result.zenith[1], 'chisq': result.chisq[-1],
+               'iterations': result.iterations, 'nfev': result.nfev, 'error': ''}
+    except Exception as err: # one bad frame must not stop the night
+        row = {'xz': '', 'yz': '', 'chisq': '', 'iterations': '', 'nfev': '', 'error': f'{type(err).__name__}: {err}'}
+    row['frame'] = path
+    row['seconds'] = time.perf_counter() - start
+    return row
+
+def latest_rows(results_path):
+    """
+    the last row of every frame in a results table (a frame retried by a later run is written again)
+    """
+    if not os.path.exists(results_path):
+        return {}
+    with open(results_path, newline='') as f:
+        return {row['frame']: row for row in csv.DictReader(f) if row.get('frame')}
+
+def is_finished(row, settings=None):
+    """
+    True if a results row holds a successful solve (a row cut short by a crash is not), made with
+    the given settings (see settings_key) if any
+    """
+    if not all(row.get(c) is not None for c in results_columns) or row['error'] or row['xz'] == '':
+        return False
+    return settings is None or row['settings'] == settings
+
+def finished_frames(results_path, settings=None):
+    """
+    frames already solved successfully (with the given settings) according to a results table (the checkpoint)
+    """
+    return {frame for frame, row in latest_rows(results_path).items() if is_finished(row, settings)}
+
+def compact_results(results_path, settings=None):
+    """
+    rewrite a results table keeping only its successful rows (made with the given settings), one
+    per frame, so the frames about to be solved again don't leave stale rows behind
+    """
+    rows = [row for row in latest_rows(results_path).values() if is_finished(row, settings)]
+    with open(results_path + '.part', 'w', newline='') as f:
+        writer = csv.DictWriter(f, results_columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(results_path + '.part', results_path)
+
+def calibrate_night(directory, results_path=None, workers=None, bounds=(0, 4000, 0, 3000), pattern='*.csv',
+                    method='quadrant', tol=None, max_iter=None, site=None, resume=True):
+    """
+    find the zenith of every frame in a capture directory, spread over a process pool
+
+    each result is appended to the results table (and flushed) as soon as its frame finishes,
+    so the table doubles as a checkpoint: a rerun drops the failed and half-written rows from it,
+    as well as rows solved with other settings (bounds, method, tol, max_iter or site), and solves
+    just those frames again
+
+    params
+    ------
+    directory : str, capture directory to walk
+    results_path : str, results table (defaults to zenith_results.csv in the directory)
+    workers : int, worker processes (None uses every core)
+    bounds : (x1, x2, y1, y2), the image area to search
+    pattern : str, glob pattern of the frame files
+    method, tol, max_iter : passed on to position_functions.zenith_finder
+    site : (lat, lon), observer position for frames with a time in their name (see solve_frame)
+    resume : bool, skip frames already solved in the results table (False starts the table over)
+
+    output
+    ------
+    list of dict, the rows written by this run
+    """
+    if results_path is None:
+        results_path = os.path.join(directory, default_results_name)
+    if not resume and os.path.exists(results_path):
+        os.remove(results_path)
+    settings = settings_key(bounds, method, tol, max_iter, site)
+    if os.path.exists(results_path):
+        compact_results(results_path, settings)
+    done = finished_frames(results_path, settings)
+    frames = [p for p in find_frames(directory, pattern, exclude=(os.path.basename(results_path),)) if p not in done]
+
+    rows = []
+    new_table = not os.path.exists(results_path)
+    with open(results_path, 'a', newline='') as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(f, results_columns)
+        if new_table:
+            writer.writeheader()
+        futures = [pool.submit(solve_frame, p, bounds, method, tol, max_iter, site) for p in frames]
+        for future in as_completed(futures):
+            row = future.result()
+            row['settings'] = settings
+            writer.writerow(row)
+            f.flush()
+            rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='find the zenith of every frame in a capture directory')
+    parser.add_argument('directory', help='capture directory, e.g. 20220620/')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--results', default=None, help=f'results table (default: DIRECTORY/{default_results_name})')
+    parser.add_argument('--pattern', default='*.csv', help='glob pattern of the frame files')
+    parser.add_argument('--bounds', type=float, nargs=4, default=(0, 4000, 0, 3000), metavar=('X1', 'X2', 'Y1', 'Y2'), help='image area to search')
+    parser.add_argument('--method', default='quadrant', choices=['quadrant', 'direct'])
+    parser.add_argument('--tol', type=float, default=None, help='pixel tolerance')
+    parser.add_argument('--max-iter', type=int, default=None)
+    parser.add_argument('--site', type=float, nargs=2, default=None, metavar=('LAT', 'LON'), help='observer latitude and east longitude')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and solve every frame again')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = calibrate_night(args.directory, args.results, args.workers, args.bounds, args.pattern, args.method,
+                           args.tol, args.max_iter, args.site, resume=not args.restart)
+    failed = sum(1 for row in rows if row['error'])
+    print(f'{len(rows)} frames solved ({failed} failed) in {time.perf_counter() - start:.1f} s')
+
+if __name__ == '__main__':
+    main()
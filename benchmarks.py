@@ -0,0 +1,138 @@
+# imports
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import time
+import numpy as np
+import calibration
+import position_functions
+import star_collection
+
+# the lens the synthetic catalogs are drawn through
+true_zenith = (2050.3, 1480.7)
+true_lens = calibration.lens_calibration(*true_zenith, rotation=352.0, coeffs=[0.03, 3e-6])
+image = (0, 4000, 0, 3000)
+
+def synthetic_catalog(n, lens=true_lens, noise=0.5, min_alt=5, seed=0):
+    """
+    n stars spread evenly over the sky above min_alt, placed on the image through a known lens
+    model with gaussian pixel noise
+
+    params
+    ------
+    n : int, number of stars
+    lens : class~calibration.lens_calibration, the true camera
+    noise : float, standard deviation of the pixel noise
+    min_alt : float, lowest altitude in degrees
+    seed : int, random seed
+
+    output
+    ------
+    class~star_collection.catalog
+    """
+    rng = np.random.default_rng(seed)
+    alt = np.degrees(np.arcsin(rng.uniform(np.sin(np.radians(min_alt)), 1, n)))
+    az = rng.uniform(0, 360, n)
+    x, y = lens.altaz2xy(alt, az)
+    x = x + rng.normal(0, noise, n)
+    y = y + rng.normal(0, noise, n)
+    return star_collection.catalog(np.char.add('S', np.arange(n).astype(str)), x, y, alt, az)
+
+def timed(fn, min_time=0.2, max_repeats=25):
+    """
+    wall times of repeated calls of fn (at least one, then until min_time has passed), after one
+    untimed call so lazy imports (scipy, plotting) and first-use caches are not counted
+    """
+    fn()
+    times = []
+    while not times or (sum(times) < min_time and len(times) < max_repeats):
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+    return times, out
+
+def stages(stars):
+    """
+    the solver stages to time on a catalog, as (name, function, accuracy) where accuracy turns
+    the function's output into a zenith error in pixels (or is None)
+    """
+    area = position_functions.area(*image)
+    centres = np.array(area.quads)
+    located = star_collection.gimmiestars(centres[:, :1], centres[:, 1:], stars)
+    inside = located['r'] < position_functions.inspection_radius
+    one = star_collection.gimmiestars(*true_zenith, stars)
+    error = lambda result: float(np.hypot(*np.subtract(result.zenith, true_zenith)))
+    return [
+        ('xy2pol', lambda: star_collection.xy2pol(stars.x, stars.y, *true_zenith), None),
+        ('catalog_build', lambda: star_collection.gimmiestars(centres[:, :1], centres[:, 1:], stars), None),
+        ('starpos', lambda: position_functions.starpos(one, position_functions.inspection_radius), None),
+        ('quadrant_fit', lambda: position_functions.fit_cosfit(located['r'], located['alt'], inside), None),
+        ('optimal_quadrant', lambda: position_functions.optimal_quadrant(area, stars), None),
+        ('zenith_finder', lambda: position_functions.zenith_finder(area, visualise=False, stars=stars), error),
+        ('zenith_finder_direct', lambda: position_functions.zenith_finder(area, visualise=False, stars=stars, method='direct'), error),
+        ('calibrate', lambda: calibration.calibrate(stars, initial_image=area), error),
+    ]
+
+def run(sizes=(104, 1_000, 10_000, 100_000), only=None, min_time=0.2):
+    """
+    time every stage on synthetic catalogs of each size
+
+    output
+    ------
+    dict with the run's metadata and one result per (stage, size)
+    """
+    results = []
+    for n in sizes:
+        stars = synthetic_catalog(n)
+        for name, fn, accuracy in stages(stars):
+            if only and name not in only:
+                continue
+            times, out = timed(fn, min_time)
+            row = {'stage': name, 'stars': n, 'repeats': len(times), 'min_s': min(times), 'median_s': float(np.median(times))}
+            if accuracy is not None:
+                row['zenith_error_px'] = accuracy(out)
+            results.append(row)
+            print(f'{name:<22}{n:>8}{row["min_s"]*1e3:>12.3f} ms' + (f'{row["zenith_error_px"]:>12.4f} px' if accuracy else ''), flush=True)
+    return {'meta': metadata(), 'true_zenith': true_zenith, 'results': results}
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'time': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.platform()}
+
+def compare(new, old):
+    """
+    print the speed ratio and accuracy change of every (stage, size) found in two runs
+    """
+    before = {(r['stage'], r['stars']): r for r in old['results']}
+    print(f'{"stage":<22}{"stars":>8}{"old ms":>12}{"new ms":>12}{"speedup":>10}{"old px":>10}{"new px":>10}')
+    for r in new['results']:
+        o = before.get((r['stage'], r['stars']))
+        if o is None:
+            continue
+        px = f'{o.get("zenith_error_px", float("nan")):>10.4f}{r.get("zenith_error_px", float("nan")):>10.4f}' if 'zenith_error_px' in r else ''
+        print(f'{r["stage"]:<22}{r["stars"]:>8}{o["min_s"]*1e3:>12.3f}{r["min_s"]*1e3:>12.3f}{o["min_s"]/r["min_s"]:>9.2f}x{px}')
+
+def main():
+    parser = argparse.ArgumentParser(description='time the zenith solver stages on synthetic catalogs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[104, 1_000, 10_000, 100_000], help='catalog sizes')
+    parser.add_argument('--stages', nargs='+', default=None, help='only run these stages')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to keep repeating each stage for')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the results')
+    parser.add_argument('--compare', default=None, help='an earlier results file to compare against')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.min_time)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+# imports
+import numpy as np
+import star_collection
+
+def altaz2vec(alt, az):
+    """
+    unit vectors on the sky [east, north, up] for altitudes and azimuths in degrees
+    """
+    alt, az = np.radians(alt), np.radians(az)
+    return np.stack([np.cos(alt)*np.sin(az), np.cos(alt)*np.cos(az), np.sin(alt)], axis=-1)
+
+def vec2altaz(vec):
+    """
+    altitudes and azimuths in degrees of unit vectors on the sky [east, north, up]
+    """
+    alt = np.degrees(np.arcsin(np.clip(vec[..., 2], -1, 1)))
+    az = np.degrees(np.arctan2(vec[..., 0], vec[..., 1])) % 360
+    return alt, az
+
+def tilt_matrix(tilt):
+    """
+    rotation taking camera vectors to sky vectors for a lens axis tilted by (tilt_x, tilt_y) degrees
+    (about the east and north axes respectively)
+    """
+    tx, ty = np.radians(tilt)
+    rx = np.array([[1, 0, 0], [0, np.cos(tx), -np.sin(tx)], [0, np.sin(tx), np.cos(tx)]])
+    ry = np.array([[np.cos(ty), 0, np.sin(ty)], [0, 1, 0], [-np.sin(ty), 0, np.cos(ty)]])
+    return rx @ ry
+
+# camera model linking pixels to the sky
+class lens_calibration:
+    """
+    all-sky lens model: the pixel the lens axis falls on, the rotation of the image about it,
+    a radial polynomial for the angle from the axis and (optionally) the tilt of the axis
+
+        angle from axis = k1*r + k2*r**2 + ...     (degrees, r in pixels from (xc, yc))
+        az = parity*theta + rotation               (degrees, theta from star_collection.xy2pol)
+
+    with no tilt the axis is the zenith, so (xc, yc) is the zenith pixel and the angle from the
+    axis is the zenith distance
+
+    params
+    ------
+    xc, yc : float, pixel coordinates of the lens axis (the zenith when tilt is 0)
+    rotation : float, azimuth of theta = 0 (the -y direction of the image) in degrees
+    coeffs : list/array, [k1, k2, ...] radial polynomial coefficients (k1 alone is an equidistant fisheye)
+    parity : int, +1 if az increases with theta, -1 if the image is mirrored
+    tilt : (float, float), tilt of the lens axis from the zenith about the east and north axes in degrees
+    """
+    def __init__(self, xc, yc, rotation, coeffs, parity=1, tilt=(0, 0)):
+        self.xc = float(xc)
+        self.yc = float(yc)
+        self.rotation = float(rotation) % 360
+        self.coeffs = np.asarray(coeffs, dtype=float)
+        self.parity = int(parity)
+        self.tilt = (float(tilt[0]), float(tilt[1]))
+        self.matrix = tilt_matrix(self.tilt)
+
+        # filled in by calibrate
+        self.residuals = None # on-sky distance of each star from its fitted position in degrees
+        self.rms = None # rms of the residuals in degrees
+        self.nfev = 0 # residual evaluations used by the fit
+
+    @property
+    def zenith(self):
+        """
+        [x, y] pixel of the zenith
+        """
+        if self.tilt == (0, 0):
+            return [self.xc, self.yc]
+        x, y = self.altaz2xy(90, 0)
+        return [float(x), float(y)]
+
+    @property
+    def params(self):
+        """
+        the model as one flat vector [xc, yc, rotation, parity, tilt_x, tilt_y, k1, k2, ...]
+        """
+        return np.concatenate([[self.xc, self.yc, self.rotation, self.parity], self.tilt, self.coeffs])
+
+    def axis_angle(self, r):
+        """
+        angle from the lens axis in degrees of points r pixels from (xc, yc)
+        """
+        r = np.asarray(r, dtype=float)
+        return r*np.polyval(self.coeffs[::-1], r)
+
+    def radius(self, angle, iterations=20):
+        """
+        invert axis_angle: pixel radius of points angle degrees from the lens axis (newton's method)
+        """
+        angle = np.asarray(angle, dtype=float)
+        slope = np.polyder(np.concatenate([self.coeffs[::-1], [0]]))
+        r = angle/self.coeffs[0]
+        for _ in range(iterations):
+            r = r - (self.axis_angle(r) - angle)/np.polyval(slope, r)
+        return r
+
+    def xy2altaz(self, x, y):
+        """
+        sky coordinates (alt, az) in degrees of pixels (x, y)
+        """
+        r, theta = star_collection.xy2pol(x, y, self.xc, self.yc)
+        angle = np.radians(self.axis_angle(r))
+        phi = np.radians(self.parity*theta + self.rotation)
+        camera = np.stack([np.sin(angle)*np.sin(phi), np.sin(angle)*np.cos(phi), np.cos(angle)], axis=-1)
+        return vec2altaz(camera @ self.matrix.T)
+
+    def altaz2xy(self, alt, az):
+        """
+        pixel coordinates (x, y) of sky positions (alt, az) in degrees
+        """
+        camera = altaz2vec(alt, az) @ self.matrix
+        r = self.radius(np.degrees(np.arccos(np.clip(camera[..., 2], -1, 1))))
+        theta = self.parity*(np.arctan2(camera[..., 0], camera[..., 1]) - np.radians(self.rotation))
+        # xy2pol measures theta from -y towards -x
+        return self.xc - r*np.sin(theta), self.yc - r*np.cos(theta)
+
+    def __repr__(self):
+        return f'lens_calibration(xc={self.xc:.3f}, yc={self.yc:.3f}, rotation={self.rotation:.3f}, coeffs={self.coeffs.tolist()}, parity={self.parity}, tilt=({self.tilt[0]:.3f}, {self.tilt[1]:.3f}), rms={self.rms})'
+
+def calibrate(stars=None, zenith=None, initial_image=None, degree=3, tilt=False, loss='soft_l1', f_scale=0.5, fix_zenith=False):
+    """
+    fit the zenith, image rotation and radial distortion together in one least-squares solve,
+    comparing the on-sky position predicted for every star with its catalog (alt, az)
+
+    all stars are used (no inspection radius), the radial polynomial takes care of the distortion
+    at the edge and the robust loss keeps misidentified stars from dragging the fit
+
+    params
+    ------
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    zenith : [x, y], starting guess for the zenith (e.g. a zenith_finder result)
+    initial_image : class~position_functions.area, its centre is the starting guess when zenith is not given
+    degree : int, degree of the radial polynomial (1 is an equidistant fisheye)
+    tilt : bool, also fit the tilt of the lens axis away from the zenith
+    loss : str, scipy.optimize.least_squares loss ('linear' for plain least squares)
+    f_scale : float, on-sky residual in degrees where the robust loss starts to soften
+    fix_zenith : bool, hold the lens centre (xc, yc) at the given zenith and only fit the rotation,
+        tilt and radial terms (with a tilt the fitted zenith moves away from the centre)
+
+    output
+    ------
+    class~lens_calibration
+    """
+    if stars is None:
+        stars = star_collection.default_stars()
+    usable = np.isfinite(stars.alt) & np.isfinite(stars.az) # e.g. rows of the csv with only ra/dec
+    if not usable.all():
+        stars = star_collection.catalog(stars.name[usable], stars.x[usable], stars.y[usable], stars.alt[usable],
+                                        stars.az[usable], stars.ra[usable], stars.dec[usable])
+    if fix_zenith and zenith is None:
+        raise ValueError('fix_zenith needs a zenith')
+    n_params = 3 + degree + (2 if tilt else 0) - (2 if fix_zenith else 0)
+    if 2*len(stars) < n_params:
+        raise ValueError(f'need at least {(n_params + 1)//2} stars to fit this lens model')
+    if zenith is None:
+        if initial_image is None:
+            zenith = [np.mean([stars.x.min(), stars.x.max()]), np.mean([stars.y.min(), stars.y.max()])]
+        else:
+            zenith = initial_image.center
+
+    observed = altaz2vec(stars.alt, stars.az)
+
+    def model(p, parity):
+        # p = [xc, yc, rotation, (tilt_x, tilt_y,) k1, k2, ...]
+        if tilt:
+            return lens_calibration(p[0], p[1], p[2], p[5:], parity, p[3:5])
+        return lens_calibration(p[0], p[1], p[2], p[3:], parity)
+
+    def residuals(p, parity):
+        if fix_zenith:
+            p = np.concatenate([zenith, p])
+        return (altaz2vec(*model(p, parity).xy2altaz(stars.x, stars.y)) - observed).ravel()
+
+    import scipy.optimize as opt # only needed to fit, not to use a calibration
+    best = None
+    for parity in (1, -1):
+        # starting guess: equidistant fisheye through the starting zenith, rotation from the mean offset in az
+        r, theta = star_collection.xy2pol(stars.x, stars.y, *zenith)
+        k1 = np.sum(r*(90 - stars.alt))/np.sum(r*r)
+        offset = np.radians(stars.az - parity*theta)
+        rotation = np.degrees(np.arctan2(np.sin(offset).mean(), np.cos(offset).mean()))
+        p0 = np.concatenate([zenith, [rotation], [0, 0] if tilt else [], [k1], np.zeros(degree - 1)])
+
+        # scale each parameter by its typical size so the solver steps evenly
+        scale = np.concatenate([[100, 100, 1], [1, 1] if tilt else [], [k1/max(r.max(), 1)**i for i in range(degree)]])
+        if fix_zenith:
+            p0, scale = p0[2:], scale[2:]
+        fit = opt.least_squares(residuals, p0, args=(parity,), loss=loss, f_scale=np.radians(f_scale), x_scale=scale)
+        if best is None or fit.cost < best[0].cost:
+            best = (fit, parity)
+
+    fit, parity = best
+    calibration = model(np.concatenate([zenith, fit.x]) if fix_zenith else fit.x, parity)
+    chord = np.linalg.norm(fit.fun.reshape(-1, 3), axis=-1)
+    calibration.residuals = np.degrees(2*np.arcsin(np.clip(chord/2, 0, 1)))
+    calibration.rms = float(np.sqrt(np.mean(calibration.residuals**2)))
+    calibration.nfev = fit.nfev
+    return calibration
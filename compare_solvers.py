@@ -0,0 +1,52 @@
+# imports
+import argparse
+import time
+import numpy as np
+import position_functions
+
+def compare_solvers(initial_image=None, stars=None, repeat=5, methods=('quadrant', 'direct')):
+    """
+    run each zenith_finder method on the same catalog and compare them
+
+    params
+    ------
+    initial_image : class~position_functions.area to search (defaults to a 4000 x 3000 image)
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    repeat : int, number of solves per method (the fastest wall time is reported)
+    methods : the zenith_finder methods to compare, the first one is the reference
+
+    output
+    ------
+    list of dict, one per method: method, zenith, chisq, iterations, nfev, seconds and the
+    distance in pixels from the reference method's zenith
+    """
+    if initial_image is None:
+        initial_image = position_functions.area(0, 4000, 0, 3000)
+
+    rows = []
+    for method in methods:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = position_functions.zenith_finder(initial_image, visualise=False, stars=stars, method=method)
+            times.append(time.perf_counter() - start)
+        rows.append({'method': method, 'zenith': result.zenith, 'chisq': result.chisq[-1], 'iterations': result.iterations,
+                     'nfev': result.nfev, 'seconds': min(times)})
+
+    for row in rows:
+        row['offset'] = float(np.hypot(*np.subtract(row['zenith'], rows[0]['zenith'])))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='compare the zenith_finder methods on the bundled star catalog')
+    parser.add_argument('--repeat', type=int, default=5, help='solves per method, the fastest is reported')
+    parser.add_argument('--size', type=float, nargs=2, default=(4000, 3000), metavar=('WIDTH', 'HEIGHT'), help='image size in pixels')
+    args = parser.parse_args()
+
+    rows = compare_solvers(position_functions.area(0, args.size[0], 0, args.size[1]), repeat=args.repeat)
+    print(f'{"method":<10}{"zenith x":>12}{"zenith y":>12}{"offset px":>12}{"chisq":>12}{"iters":>8}{"nfev":>8}{"ms":>10}')
+    for row in rows:
+        print(f'{row["method"]:<10}{row["zenith"][0]:>12.3f}{row["zenith"][1]:>12.3f}{row["offset"]:>12.4f}{row["chisq"]:>12.5f}{row["iterations"]:>8}{row["nfev"]:>8}{row["seconds"]*1e3:>10.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# imports
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib import patches as patches
+
+def plot_img(img, save=False, name=None): # plot the image with the dark axis
+    plt.figure(facecolor='#050505')
+    plt.gca().tick_params(axis='x', colors='#aaaaaa')
+    plt.gca().tick_params(axis='y', colors='#aaaaaa')
+    plt.imshow(img)
+    plt.xlim(0, img.shape[1])
+    plt.ylim(img.shape[0], 0)
+    if save == True:
+        plt.savefig(f'{name}.pdf', bbox_inches='tight')
+
+def plot_search(initial_image, result, img, save=False, name=None):
+    """
+    draw a zenith search over the image: the quadrant chosen at each level (quadrant search) or
+    the zenith after each pass (direct search), and the final zenith
+
+    params
+    ------
+    initial_image : class~position_functions.area that was searched
+    result : class~position_functions.zenith_result of the search
+    img : the image to draw on
+    save : bool, also save the figure as {name}.pdf
+    """
+    quads = result.quads
+    # plt.rcParams["figure.figsize"] = [20,20]
+    plot_img(img)
+    plt.plot(initial_image.center[0], initial_image.center[1])
+
+    for quad in quads:
+        plt.plot(quad.center[0], quad.center[1], 'rx')
+        plt.gca().add_patch(patches.Rectangle((quad.x1, quad.y1), quad.x2-quad.x1, quad.y2-quad.y1, linewidth=1, edgecolor='none', facecolor='green', alpha=0.2))
+    if quads:
+        plt.gca().add_patch(patches.Rectangle((quads[-1].x1, quads[-1].y1), quads[-1].x2-quads[-1].x1, quads[-1].y2-quads[-1].y1, linewidth=1, edgecolor='none', facecolor='green', alpha=0.2))
+    if result.path:
+        plt.plot(*np.transpose(result.path), 'r.-', linewidth=0.5)
+    plt.plot(result.zenith[0], result.zenith[1], 'bx')
+    if save == True:
+        plt.savefig(f'{name}.pdf', bbox_inches='tight')
+    plt.show()
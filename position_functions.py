@@ -1,9 +1,11 @@
 # imports
+import cProfile
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 import numpy as np
-from matplotlib import pyplot as plt
-from matplotlib import patches as patches
 import star_collection
-import scipy.optimize as opt
+# matplotlib (plotting) and scipy (direct_search) are imported on first use, so the solver
+# itself only needs numpy
 
 # position function
 def starpos(stars_list, inspection_radius):
@@ -12,60 +14,34 @@ def starpos(stars_list, inspection_radius):
     
     params
     ------
-    stars : list/array, contains all coordinates for all collected stars in the image 
+    stars : dict of numpy columns {name, x, y, r, theta, alt, az} from star_collection.gimmiestars
     inspection_radius : int, radius from the zenith of stars to look at in pixels
             
     output
     ------
-    alt-r fit, az-theta fit
+    x, y, r, theta, alt, az, alt_prop : numpy arrays for the stars within the inspection radius
     """
     
     # define the radius in which the stars will be looked at
-    stars = []
-    for star in stars_list: # get rid of the pesky distorted stars at the edge
-        if star[3] < inspection_radius:
-            stars.append(star)
-    
-    # define empty lists for the coords to go
-    x = []
-    y = []
-    r = []
-    theta = []
-    alt = []
-    az = []
-    outliers = []
-    x_o = []
-    y_o = []
-    theta_o = []
-    az_o = []
-    alt_prop = []
-
-    # add the coordinates for each star
-    for star in stars:
-        x.append(star[1])
-        y.append(star[2])
-        r.append(star[3])
-        theta.append(star[4])
-        alt.append(star[5])
-        az.append(star[6])
-        alt_prop.append(90/(star[5]))
+    inside = stars_list['r'] < inspection_radius # get rid of the pesky distorted stars at the edge
     
     # check values
-    if len(x) == 0:
-        raise ValueError('no x values')
-    if len(y) == 0:
-        raise ValueError('no y values')
-    if len(r) == 0:
-        raise ValueError('no r values')
-    if len(theta) == 0:
-        raise ValueError('no theta values')
-    if len(alt) == 0:
-        raise ValueError('no alt values')
-    if len(az) == 0:
-        raise ValueError('no az values')
+    if not inside.any():
+        raise ValueError('no stars within the inspection radius')
+    
+    x = stars_list['x'][inside]
+    y = stars_list['y'][inside]
+    r = stars_list['r'][inside]
+    theta = stars_list['theta'][inside]
+    alt = stars_list['alt'][inside]
+    az = stars_list['az'][inside]
+    alt_prop = 90/alt
     
     return x, y, r, theta, alt, az, alt_prop
 
+# radius from the zenith of stars used in the fits, in pixels
+inspection_radius = 3000
+
 # define what an area is (aka the image area for the image we are looking at)
 class area:
     def __init__(self, x1, x2, y1, y2):
@@ -81,6 +57,12 @@ class area:
         down = self.center[1] - (self.center[1] - y1)/2
         self.quads = [[left, up], [right, up], [left, down], [right, down]]
         
+        # best fit found for this area by optimal_quadrant (used to warm-start the next level)
+        self.popt = None
+        self.chisq = None
+        self.nfev = 0
+        self.stars_kept = 0 # stars inside the inspection radius of that fit
+        
 # expected fit
 def cosfit(x, a, b, c):
   return a*np.cos(b*x) + c
@@ -90,17 +72,172 @@ def chisquare(obs, exp):
     bottom = exp
     return sum(top / bottom)
 
-def plot_img(img, save=False, name=None): # plot the image with the dark axis
-    plt.figure(facecolor='#050505')
-    plt.gca().tick_params(axis='x', colors='#aaaaaa')
-    plt.gca().tick_params(axis='y', colors='#aaaaaa')
-    plt.imshow(img)
-    plt.xlim(0, img.shape[1])
-    plt.ylim(img.shape[0], 0)
-    if save == True:
-        plt.savefig(f'{name}.pdf', bbox_inches='tight')
+def fit_cosfit(r, alt, inside=None, b0=None, n_grid=48, n_check=6, n_refine=5, t_range=(1e-3, 2*np.pi), max_elements=2**22):
+    """
+    fit cosfit to the stars of many candidate zenith positions at once
+    
+    for a fixed b the model is linear in a and c, so they are solved in closed form for a whole
+    grid of b values (broadcast over candidates x b values x stars); the b with the smallest
+    squared residual is then refined by zooming the grid in around it
+    
+    params
+    ------
+    r : array (k, n), distance of each star from each of the k candidate zeniths in pixels
+    alt : array (n,) or (k, n), altitude of each star in degrees
+    inside : bool array (k, n), stars to use for each candidate (defaults to all of them)
+    b0 : float, b of a previous fit to start the search around (e.g. the parent quadrant's fit);
+        the full initial grid is skipped for candidates whose minimum near b0 beats a sparse
+        check of it
+    n_grid : int, number of b values in the initial grid
+    n_check : int, every n_check-th b value of the initial grid is checked against a warm start
+    n_refine : int, number of times the grid is zoomed in around the best b
+    t_range : (float, float), range of b*max(r) covered by the initial grid
+    max_elements : int, rough cap on the size of the candidates x b values x stars work arrays
+    
+    output
+    ------
+    popt : array (k, 3), fitted (a, b, c) for each candidate
+    chisq : array (k,), chisquare of each fit (inf if the candidate has fewer than 3 stars)
+    nfev : int, number of model evaluations (candidates x b values tried)
+    """
+    r = np.atleast_2d(np.asarray(r, dtype=float))
+    alt = np.broadcast_to(np.asarray(alt, dtype=float), r.shape)
+    w = np.ones(r.shape) if inside is None else np.asarray(inside, dtype=float)
+    alt = np.where(w > 0, alt, 0) # stars left out may have no alt (nan*0 is still nan)
+    n = w.sum(axis=-1)
+    ok = n >= 3
+    n = np.where(ok, n, 1)
+    
+    # weighted means/variances of alt are the same for every b
+    alt_mean = (w*alt).sum(axis=-1)/n
+    dalt = (alt - alt_mean[:, None])*w
+    ss_alt = (dalt*alt).sum(axis=-1)
+    r_ref = np.where(ok, np.max(r*w, axis=-1), 1)
+    
+    half_r = r/2
+    def sse(b, rows):
+        # a*cos(b*r) + c == p + q*v with v = (1 - cos(b*r))/b**2 = 2*sin(b*r/2)**2/b**2, which stays well conditioned as b -> 0
+        # (v is built without the 2/b**2 factor, which is put back on the sums)
+        s = np.sin(b[..., None]*half_r[rows, None, :])
+        v = s*s
+        wv = v*w[rows, None, :]
+        scale = 2/b**2
+        s_v = scale*wv.sum(axis=-1)
+        s_vv = scale**2*np.einsum('kmn,kmn->km', wv, v) - s_v**2/n[rows, None]
+        s_va = scale*np.einsum('kmn,kn->km', v, dalt[rows])
+        q = s_va/np.where(s_vv > 0, s_vv, np.inf)
+        return ss_alt[rows, None] - q*s_va, q, alt_mean[rows, None] - q*s_v/n[rows, None]
+    
+    def bracket(grid, rows):
+        # the best b on each row of the grid, its two neighbours and its squared residual
+        # (a few b values at a time on big catalogs, so the candidates x b x stars arrays stay small)
+        step = max(1, max_elements//(len(rows)*r.shape[1]))
+        err = np.concatenate([sse(grid[:, j:j + step], rows)[0] for j in range(0, grid.shape[1], step)], axis=-1)
+        best = np.argmin(err, axis=-1)
+        i = np.arange(len(grid))
+        return grid[i, np.maximum(best - 1, 0)], grid[i, np.minimum(best + 1, grid.shape[1] - 1)], grid[i, best], best, err[i, best]
+    
+    k = len(r)
+    every = np.arange(k)
+    coarse = np.geomspace(*t_range, n_grid)[None, :]/r_ref[:, None]
+    lo, hi, b = np.empty(k), np.empty(k), np.empty(k)
+    nfev = 0
+    cold = every
+    if b0 is not None and b0 != 0: # narrow grid around the warm start (kept inside the range of the coarse grid)
+        grid = np.clip(abs(b0)*np.geomspace(1/4, 4, 9)[None, :], coarse[:, :1], coarse[:, -1:])
+        lo, hi, b, best, err = bracket(grid, every)
+        # the warm minimum is only trusted if it is inside its grid and below a sparse sample of the
+        # coarse grid, otherwise the candidate gets the full coarse search
+        check = coarse[:, ::n_check]
+        check_err = sse(check, every)[0].min(axis=-1)
+        nfev += grid.size + check.size
+        cold = every[(best == 0) | (best == grid.shape[1] - 1) | (err >= check_err)]
+    if len(cold): # coarse grid over the whole range of b
+        lo[cold], hi[cold], b[cold], _, _ = bracket(coarse[cold], cold)
+        nfev += coarse[cold].size
+    
+    # zoom in around the best b
+    for _ in range(n_refine):
+        grid = np.geomspace(lo, hi, 9, axis=-1)
+        lo, hi, b, _, _ = bracket(grid, every)
+        nfev += grid.size
+    
+    # finish with the vertex of the parabola (in log b) through the final bracket
+    u = np.log(np.stack([lo, b, hi], axis=-1))
+    e = sse(np.exp(u), every)[0]
+    nfev += e.size
+    with np.errstate(divide='ignore', invalid='ignore'): # the bracket collapses when b sits on the edge of the grid
+        curve = (e[:, 2] - e[:, 1])/(u[:, 2] - u[:, 1]) - (e[:, 1] - e[:, 0])/(u[:, 1] - u[:, 0])
+        slope = (e[:, 2] - e[:, 0])/(u[:, 2] - u[:, 0])
+        step = np.where(curve > 0, -slope*(u[:, 2] - u[:, 0])/(2*curve), 0)
+    b = np.exp(u[:, 1] + np.clip(step, u[:, 0] - u[:, 1], u[:, 2] - u[:, 1]))
+    
+    _, q, p = sse(b[:, None], every)
+    q, p = q[:, 0], p[:, 0]
+    a = -q/b**2
+    popt = np.stack([a, b, p - a], axis=-1)
+    
+    exp = p[:, None] + q[:, None]*2*np.sin(b[:, None]*r/2)**2/b[:, None]**2 # == cosfit(r, *popt) without the cancellation
+    exp = np.where(w > 0, exp, 1)
+    chisq = np.where(ok, (w*(alt - exp)**2/exp).sum(axis=-1), np.inf)
+    return popt, chisq, nfev
+
+def fit_failures(popt, chisq):
+    """
+    number of fits from fit_cosfit that failed: too few stars, a non-finite result, or a flat
+    (degenerate, a == 0) curve
+    """
+    return np.count_nonzero(~np.isfinite(chisq) | ~np.isfinite(popt).all(axis=-1) | (popt[:, 0] == 0))
+
+def plot_img(img, save=False, name=None): # plot the image with the dark axis (see plotting.plot_img)
+    import plotting
+    plotting.plot_img(img, save, name)
+
+# timings and fit statistics of a solve, filled in when passed as trace= to the solver
+class solve_trace:
+    """
+    record of where a zenith search spends its time
+
+    every optimal_quadrant level (or direct search evaluation) adds a dict to levels with
+    area : (x1, x2, y1, y2) searched (the candidate position for the direct search)
+    catalog_s, cut_s, fit_s : wall time of placing the stars, the inspection radius cut and the fit
+    stars_kept : stars inside the inspection radius of each candidate
+    nfev : model evaluations of the fit
+    failed : candidates whose fit failed (too few stars, or a non-finite/degenerate fit)
+    chisq : chisquare of the best candidate
+
+    params
+    ------
+    callback : function, called with each level's dict as soon as it is recorded (e.g. for logging)
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.levels = []
+        self.stages = {} # wall time of the solve's other stages (frame_stars, search, plot)
+
+    def record(self, **level):
+        level['level'] = len(self.levels)
+        self.levels.append(level)
+        if self.callback is not None:
+            self.callback(level)
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
 
-def optimal_quadrant(inspection_area):
+    def totals(self):
+        """
+        summed time of each stage and the fit statistics over every level
+        """
+        out = dict(self.stages)
+        for key in ('catalog_s', 'cut_s', 'fit_s', 'nfev', 'failed'):
+            out[key] = sum(level[key] for level in self.levels)
+        out['levels'] = len(self.levels)
+        return out
+
+    def __repr__(self):
+        return 'solve_trace(' + ', '.join(f'{k}={v:.4g}' if isinstance(v, float) else f'{k}={v}' for k, v in self.totals().items()) + ')'
+
+def optimal_quadrant(inspection_area, stars=None, time=None, site=None, trace=None):
     """
     determine the quadrant containing the zenith point in a given image
     this only gives the quadrant with the best fit 
@@ -115,35 +252,44 @@ def optimal_quadrant(inspection_area):
     ------
     x1, x2 : min and max x values defining the inspection area
     y1, y2 : min and max y values defining the inspection area
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    time, site : utc time of the frame and (lat, lon) of the observer in degrees, to fit the stars'
+        alt/az at that time (from their ra/dec) instead of the alt/az stored in the catalog
+    trace : class~solve_trace, records the timings and fit statistics of this level
     
     output
     ------
-    optimal_quadrant : the [x, y] coordinates of the centre of the quadrant containing the zenith point (best fitting values)
-    x1_new, x2_new, y1_new, y2_new : the new parameters of the inspection area (to be used in the repeat use of this function)
+    optimal_quadrant : class~area, the quadrant containing the zenith point (best fitting values)
+        its popt, chisq & nfev hold the winning (a, b, c) fit, its chisquare and the model evaluations used
+        (pass it back into this function to search it, warm-started from that fit)
     """
     # 1. DEFINE QUADRANTS
     q = inspection_area.quads
 
     # 2. DEFINE STAR COORDINATES WITH THE CENTRES OF EACH QUADRANT
-    stars1 = star_collection.gimmiestars(q[0][0], q[0][1])
-    stars2 = star_collection.gimmiestars(q[1][0], q[1][1])
-    stars3 = star_collection.gimmiestars(q[2][0], q[2][1])
-    stars4 = star_collection.gimmiestars(q[3][0], q[3][1])
-
-    inspection_radius = 3000 # pix
-    x1, y1, r1, theta1, alt1, az1, alt_prop1 = starpos(stars1, inspection_radius)
-    x2, y2, r2, theta2, alt2, az2, alt_prop2 = starpos(stars2, inspection_radius)
-    x3, y3, r3, theta3, alt3, az3, alt_prop3 = starpos(stars3, inspection_radius)
-    x4, y4, r4, theta4, alt4, az4, alt_prop4 = starpos(stars4, inspection_radius)
+    if trace is not None:
+        t0 = perf_counter()
+    centres = np.array(q)
+    stars_q = star_collection.gimmiestars(centres[:, :1], centres[:, 1:], stars, time, site) # r has shape (4, n)
+    if trace is not None:
+        t1 = perf_counter()
+    inside = (stars_q['r'] < inspection_radius) & np.isfinite(stars_q['alt']) # get rid of the pesky distorted stars at the edge (and any without an alt)
+    if trace is not None:
+        t2 = perf_counter()
     
     # 3. COMPARE THE EXPECTED AND PREDICTED VALUES FOR THE STAR POSITIONS FOR EACH QUADRANT
-    chisq = [] # place to put chisq values for each quadrant
-    rs = [r1, r2, r3, r4]
-    alts = [alt1, alt2, alt3, alt4]
-    for i in range(4):
-        popt_cos, pcov_cos = opt.curve_fit(cosfit, rs[i], alts[i], [90, 0.0008, 0], maxfev=50_000) # create a fit to the data
-        chisq.append(chisquare(alts[i], cosfit(np.array(rs[i]), *popt_cos))) # determine the goodness of fit for each quadrant
-    optimal_quadrant_ctr = q[np.argmin(chisq)]
+    # all four quadrants are fitted together, starting from the fit of the parent area if there is one
+    b0 = None if inspection_area.popt is None else inspection_area.popt[1]
+    popt, chisq, nfev = fit_cosfit(stars_q['r'], stars_q['alt'], inside, b0=b0)
+    if trace is not None:
+        t3 = perf_counter()
+        trace.record(area=(inspection_area.x1, inspection_area.x2, inspection_area.y1, inspection_area.y2),
+                     catalog_s=t1 - t0, cut_s=t2 - t1, fit_s=t3 - t2, stars_kept=inside.sum(axis=-1).tolist(),
+                     nfev=nfev, failed=int(fit_failures(popt, chisq)), chisq=float(np.min(chisq)))
+    if not np.isfinite(chisq).any():
+        raise ValueError('no stars within the inspection radius')
+    best = np.argmin(np.where(np.isfinite(chisq), chisq, np.inf))
+    optimal_quadrant_ctr = q[best]
     
     # 4. DEFINE A NEW QUADRANT
     distx = (inspection_area.x2 - inspection_area.x1)/4 # pixel distance from the centre to edge of quadrant
@@ -153,60 +299,302 @@ def optimal_quadrant(inspection_area):
     y1_new = optimal_quadrant_ctr[1] - disty
     y2_new = optimal_quadrant_ctr[1] + disty
     optimal_quadrant = area(x1_new, x2_new, y1_new, y2_new)
+    optimal_quadrant.popt = popt[best]
+    optimal_quadrant.chisq = chisq[best]
+    optimal_quadrant.nfev = nfev
+    optimal_quadrant.stars_kept = int(inside[best].sum())
     
     return optimal_quadrant
 
+# chisquare over a grid of candidate zenith positions
+class chisq_surface:
+    def __init__(self, x, y, chisq, popt, nfev):
+        self.x = x # (nx,) candidate x positions in pixels
+        self.y = y # (ny,) candidate y positions in pixels
+        self.chisq = chisq # (ny, nx) chisquare of the best fit at each candidate
+        self.popt = popt # (ny, nx, 3) fitted (a, b, c) at each candidate
+        self.nfev = nfev # model evaluations over the whole grid
+        iy, ix = np.unravel_index(np.argmin(np.where(np.isfinite(chisq), chisq, np.inf)), chisq.shape)
+        self.argmin = (iy, ix)
+        self.minimum = [float(x[ix]), float(y[iy])] # candidate with the smallest chisquare
+        
+    def seed_area(self, cells=1):
+        """
+        area of +-cells grid cells around the surface minimum, carrying its fit, to start zenith_finder from
+        """
+        dx = cells*(self.x[1] - self.x[0] if len(self.x) > 1 else 1)
+        dy = cells*(self.y[1] - self.y[0] if len(self.y) > 1 else 1)
+        seed = area(self.minimum[0] - dx, self.minimum[0] + dx, self.minimum[1] - dy, self.minimum[1] + dy)
+        seed.popt = self.popt[self.argmin]
+        seed.chisq = self.chisq[self.argmin]
+        return seed
+
+def chisquare_surface(inspection_area, resolution, stars=None, chunk_size=128, workers=None):
+    """
+    map the chisquare of the cosfit over a dense grid of candidate zenith positions
+    
+    candidates are fitted in chunks (candidates x stars at a time) so memory stays bounded on
+    large grids, and the chunks are spread over a thread pool (numpy releases the gil)
+    every cell is fitted cold, so the map is the true chisquare landscape whatever fits came before
+    
+    params
+    ------
+    inspection_area : class~area, the region to map
+    resolution : int or (int, int), number of candidates along x and y (cell centres)
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    chunk_size : int, candidates fitted per chunk
+    workers : int, threads to use (None lets the pool decide, 1 runs in this thread)
+    
+    output
+    ------
+    class~chisq_surface with the (ny, nx) chisquare array, the fits and the argmin
+    """
+    nx, ny = (resolution, resolution) if np.isscalar(resolution) else resolution
+    x = inspection_area.x1 + (np.arange(nx) + 0.5)*(inspection_area.x2 - inspection_area.x1)/nx
+    y = inspection_area.y1 + (np.arange(ny) + 0.5)*(inspection_area.y2 - inspection_area.y1)/ny
+    xz, yz = (c.ravel() for c in np.meshgrid(x, y))
+    
+    chisq = np.empty(xz.size)
+    popt = np.empty((xz.size, 3))
+    def fit_chunk(start):
+        chunk = slice(start, start + chunk_size)
+        located = star_collection.gimmiestars(xz[chunk, None], yz[chunk, None], stars)
+        popt[chunk], chisq[chunk], nfev = fit_cosfit(located['r'], located['alt'], (located['r'] < inspection_radius) & np.isfinite(located['alt']))
+        return nfev
+    
+    starts = range(0, xz.size, chunk_size)
+    if workers == 1:
+        nfev = sum(map(fit_chunk, starts))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            nfev = sum(pool.map(fit_chunk, starts))
+    
+    return chisq_surface(x, y, chisq.reshape(ny, nx), popt.reshape(ny, nx, 3), nfev)
+
+# outcome of a zenith search
+class zenith_result:
+    def __init__(self, zenith, chisq, nfev, popt, converged, quads=(), path=(), method='quadrant', stars_kept=0):
+        self.zenith = zenith # [x, y] in pixels
+        self.chisq = list(chisq) # chisquare of the best position at each iteration/level
+        self.iterations = len(self.chisq)
+        self.nfev = nfev # model evaluations over the whole search
+        self.popt = popt # (a, b, c) fit at the zenith
+        self.converged = converged # True if a tolerance stopped the search before max_iter
+        self.quads = list(quads) # the area chosen at each level (quadrant search)
+        self.path = list(path) # the best position after each iteration (direct search)
+        self.method = method
+        self.stars_kept = stars_kept # stars the final fit used (inside the inspection radius)
+        # chisquare per degree of freedom, comparable between frames with different numbers of stars
+        self.reduced_chisq = self.chisq[-1]/(stars_kept - 3) if stars_kept > 3 and self.chisq else np.inf
+        self.trace = None # class~solve_trace of the solve, if it was traced
+        
+    # unpacks like the old [x, y] return value
+    def __iter__(self):
+        return iter(self.zenith)
+    
+    def __getitem__(self, i):
+        return self.zenith[i]
+    
+    def __len__(self):
+        return len(self.zenith)
+    
+    def __repr__(self):
+        return f'zenith_result(zenith=[{self.zenith[0]:.3f}, {self.zenith[1]:.3f}], method={self.method!r}, iterations={self.iterations}, chisq={self.chisq[-1] if self.chisq else None}, nfev={self.nfev})'
+
+def quadrant_search(initial_image, stars=None, tol=None, max_iter=20, chisq_tol=None, trace=None):
+    """
+    find the zenith by repeatedly keeping the best of four quadrants (see optimal_quadrant)
+    each level is warm-started from the fit of the level before it (and the first one from
+    initial_image.popt, if it has been set)
+    
+    params
+    ------
+    initial_image : class~area containing x and y coordinates which define the image dimensions
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    tol : float, stop once the chosen quadrant is smaller than this many pixels across
+    max_iter : int, maximum number of quadrant levels
+    chisq_tol : float, stop once the chisquare changes by no more than this between levels
+    trace : class~solve_trace, records the timings and fit statistics of every level
+    
+    output
+    ------
+    class~zenith_result
+    """
+    if max_iter < 1:
+        raise ValueError('max_iter must be at least 1')
+    
+    quads = []
+    quad = initial_image
+    converged = False
+    for _ in range(max_iter):
+        quad = optimal_quadrant(quad, stars, trace=trace)
+        quads.append(quad)
+        if tol is not None and max(quad.x2 - quad.x1, quad.y2 - quad.y1) < tol:
+            converged = True
+            break
+        if chisq_tol is not None and len(quads) > 1 and abs(quads[-2].chisq - quad.chisq) <= chisq_tol:
+            converged = True
+            break
+    zenith_position = [quads[-1].center[0], quads[-1].center[1]] # the center of the final quadrant
+    
+    return zenith_result(zenith_position, [quad.chisq for quad in quads], sum(quad.nfev for quad in quads), quads[-1].popt, converged, quads=quads, stars_kept=quads[-1].stars_kept)
+
+def direct_search(initial_image, stars=None, tol=None, max_iter=200, chisq_tol=None, trace=None, max_passes=10):
+    """
+    find the zenith by fitting (xz, yz, a, b, c) together, minimising the cosfit chisquare with a
+    trust-region gauss-newton solver (scipy.optimize.least_squares) and analytic derivatives,
+    including those of r with respect to the zenith
+    
+    1. (a, b, c) are started from a fit_cosfit at the centre of the area
+    2. the stars inside the inspection radius are fixed for a pass, so the objective stays smooth
+    3. passes are repeated from the last zenith until the stars inside the radius stop changing
+    
+    params
+    ------
+    initial_image : class~area containing x and y coordinates which define the image dimensions
+        (the zenith is kept inside it; its popt, if set, warm-starts the first fit)
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    tol : float, stop a pass once the zenith moves by less than this many pixels (default 1e-4)
+    max_iter : int, maximum number of model evaluations per pass
+    chisq_tol : float, stop a pass once the chisquare changes by less than this fraction (default 1e-10)
+    trace : class~solve_trace, records the timings and fit statistics of every pass
+    max_passes : int, maximum number of passes
+    
+    output
+    ------
+    class~zenith_result
+    """
+    if max_iter < 1:
+        raise ValueError('max_iter must be at least 1')
+    import scipy.optimize as opt
+    
+    x1, x2, y1, y2 = initial_image.x1, initial_image.x2, initial_image.y1, initial_image.y2
+    zenith = np.array(initial_image.center, dtype=float)
+    popt = initial_image.popt
+    inside = None
+    nfev = 0
+    path, history = [], []
+    converged = False
+    for _ in range(max_passes):
+        if trace is not None:
+            t0 = perf_counter()
+        located = star_collection.gimmiestars(*zenith, stars)
+        if trace is not None:
+            t1 = perf_counter()
+        cut = (located['r'] < inspection_radius) & np.isfinite(located['alt'])
+        if trace is not None:
+            t2 = perf_counter()
+        if inside is not None and np.array_equal(cut, inside): # the last pass ended with the stars it started with
+            converged = True
+            break
+        inside = cut
+        x, y, alt = located['x'][inside], located['y'][inside], located['alt'][inside]
+        if len(alt) < 5:
+            raise ValueError('no stars within the inspection radius')
+        if popt is None: # start the curve from a fit at the starting zenith
+            fit, _, n = fit_cosfit(located['r'][None], located['alt'], inside[None])
+            popt, nfev = fit[0], nfev + n
+        
+        def model(p):
+            dx, dy = x - p[0], y - p[1]
+            r = np.hypot(dx, dy)
+            cos, sin = np.cos(p[3]*r), np.sin(p[3]*r)
+            return dx, dy, r, cos, sin, p[2]*cos + p[4]
+        
+        def residuals(p):
+            m = model(p)[-1]
+            return (m - alt)/np.sqrt(np.abs(m)) # (obs - exp)**2/exp summed is the chisquare
+        
+        def jacobian(p):
+            dx, dy, r, cos, sin, m = model(p)
+            dres = (m + alt)/(2*np.abs(m)**1.5) # d residual / d model
+            dr = -p[2]*p[3]*sin # d model / d r
+            with np.errstate(divide='ignore', invalid='ignore'):
+                drdx, drdy = np.where(r > 0, -dx/r, 0), np.where(r > 0, -dy/r, 0)
+            return dres[:, None]*np.stack([dr*drdx, dr*drdy, cos, -p[2]*r*sin, np.ones_like(r)], axis=-1)
+        
+        p0 = np.concatenate([zenith, popt])
+        lower = [x1, y1, -np.inf, 0, -np.inf]
+        upper = [x2, y2, np.inf, np.inf, np.inf]
+        res = opt.least_squares(residuals, np.clip(p0, lower, upper), jac=jacobian, bounds=(lower, upper), x_scale='jac',
+                                ftol=1e-10 if chisq_tol is None else chisq_tol, max_nfev=max_iter)
+        nfev += res.nfev + res.njev
+        moved = float(np.hypot(*(res.x[:2] - zenith)))
+        zenith, popt = res.x[:2], res.x[2:]
+        chisq = float(2*res.cost)
+        path.append([float(zenith[0]), float(zenith[1])])
+        history.append(chisq)
+        if trace is not None:
+            trace.record(area=(float(zenith[0]), float(zenith[0]), float(zenith[1]), float(zenith[1])), catalog_s=t1 - t0,
+                         cut_s=t2 - t1, fit_s=perf_counter() - t2, stars_kept=[int(inside.sum())], nfev=res.nfev + res.njev,
+                         failed=int(not res.success), chisq=float(chisq))
+        if moved < (1e-4 if tol is None else tol) and res.success: # nothing left to move the stars across the radius
+            converged = True
+            break
+    
+    return zenith_result([float(zenith[0]), float(zenith[1])], history, nfev, popt, converged, path=path, method='direct', stars_kept=int(inside.sum()))
+
 # function to find the zenith
-def zenith_finder(initial_image, visualise=True, img=None, save=False, name=None):
+def zenith_finder(initial_image, visualise=True, img=None, save=False, name=None, stars=None, tol=None, max_iter=None, chisq_tol=None, method='quadrant', time=None, site=None, trace=None, profile=None):
     """
-    find the pixel coordinates of the zenith using the optimal quadrant algorithm
+    find the pixel coordinates of the zenith
     
     params
     ------
     initial_image : class~area containing x and y coordinates which define the image dimensions
+    stars : class~star_collection.catalog, the stars to fit (defaults to the 20220620 collection)
+    tol : float, pixel tolerance (quadrant size for 'quadrant', last step of a pass for 'direct')
+    max_iter : int, maximum number of levels for 'quadrant' (default 20) or of model evaluations per
+        pass for 'direct' (default 200)
+    chisq_tol : float, stop once the chisquare stops changing by more than this
+    method : str, 'quadrant' for the optimal quadrant algorithm (see quadrant_search) or
+        'direct' to fit (xz, yz, a, b, c) together with gauss-newton (see direct_search), which
+        cannot lock into a wrong quadrant and needs far fewer model evaluations
+    time, site : utc time of the frame and (lat, lon) of the observer in degrees, to fit the stars'
+        alt/az at that time (from their ra/dec) instead of the alt/az stored in the catalog
+    trace : class~solve_trace (or a function, which is called with each level's record) to
+        instrument the solve; the trace is also kept as the result's trace
+    profile : str, path to dump a cprofile of the solve to (readable by pstats, snakeviz or
+        flameprof for a flame graph)
     
     output
     ------
-    zenith_position : (x, y) coordinates of the zenith position in pixels
+    class~zenith_result : the (x, y) zenith position in pixels (unpacks as x, y) plus the
+        number of iterations, per-iteration chisquare and total model evaluations
     optimal quadrant visualisation (optional)    
     """
-    # find the zenith position using the optimal quadrant algorithm (figure out how to loop this when you're less tired)
-    q1 = optimal_quadrant(initial_image)
-    q2 = optimal_quadrant(q1)
-    q3 = optimal_quadrant(q2)
-    q4 = optimal_quadrant(q3)
-    q5 = optimal_quadrant(q4)
-    q6 = optimal_quadrant(q5)
-    q7 = optimal_quadrant(q6)
-    q8 = optimal_quadrant(q7)
-    q9 = optimal_quadrant(q8)
-    q10 = optimal_quadrant(q9)
-    q11 = optimal_quadrant(q10)
-    q12 = optimal_quadrant(q11)
-    q13 = optimal_quadrant(q12)
-    q14 = optimal_quadrant(q13)
-    q15 = optimal_quadrant(q14)
-    q16 = optimal_quadrant(q15)
-    q17 = optimal_quadrant(q16)
-    q18 = optimal_quadrant(q17)
-    q19 = optimal_quadrant(q18)
-    q20 = optimal_quadrant(q19)
-    quads = [q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, q11, q12, q13, q14, q15, q16, q17, q18, q19, q20]
-    zenith_position = [quads[-1].center[0], quads[-1].center[1]] # the center of the final quadrant (now smaller than a pixel)
-    
-    # plot the visualiser if requested
-    if visualise == True:
-        # plt.rcParams["figure.figsize"] = [20,20]
-        plot_img(img)
-        plt.plot(initial_image.center[0], initial_image.center[1])
-
-        for quad in quads:
-            plt.plot(quad.center[0], quad.center[1], 'rx')
-            plt.gca().add_patch(patches.Rectangle((quad.x1, quad.y1), quad.x2-quad.x1, quad.y2-quad.y1, linewidth=1, edgecolor='none', facecolor='green', alpha=0.2))
-        plt.plot(quads[-1].center[0], quads[-1].center[1], 'bx')
-        plt.gca().add_patch(patches.Rectangle((quads[-1].x1, quads[-1].y1), quads[-1].x2-quads[-1].x1, quads[-1].y2-quads[-1].y1, linewidth=1, edgecolor='none', facecolor='green', alpha=0.2))
-        if save == True:
-            plt.savefig(f'{name}.pdf', bbox_inches='tight')
-        plt.show()
-    
-    return zenith_position
\ No newline at end of file
+    if method not in ('quadrant', 'direct'):
+        raise ValueError(f"unknown method {method!r}, expected 'quadrant' or 'direct'")
+    if trace is not None and not isinstance(trace, solve_trace):
+        trace = solve_trace(callback=trace)
+    if profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    try: # the profile is written even when the search fails, which is when it is most wanted
+        if trace is not None:
+            t0 = perf_counter()
+        stars = star_collection.frame_stars(stars, time, site) # place the stars once for the whole search
+        if trace is not None:
+            t1 = perf_counter()
+            trace.add_stage('frame_stars', t1 - t0)
+        if method == 'quadrant':
+            result = quadrant_search(initial_image, stars, tol, 20 if max_iter is None else max_iter, chisq_tol, trace)
+        else:
+            result = direct_search(initial_image, stars, tol, 200 if max_iter is None else max_iter, chisq_tol, trace)
+        if trace is not None:
+            t2 = perf_counter()
+            trace.add_stage('search', t2 - t1)
+        result.trace = trace
+    
+        # plot the visualiser if requested
+        if visualise == True:
+            import plotting
+            plotting.plot_search(initial_image, result, img, save, name)
+            if trace is not None:
+                trace.add_stage('plot', perf_counter() - t2)
+    finally:
+        if profile is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+    return result
@@ -0,0 +1,102 @@
+# imports
+import hashlib
+import os
+import tempfile
+import numpy as np
+import calibration
+
+# where the rasters are cached unless told otherwise
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'skywatch', 'sky_maps')
+
+def calibration_key(lens, shape):
+    """
+    hash identifying the rasters of a calibration on an image of a given shape
+    """
+    data = np.concatenate([lens.params, shape]).astype('<f8').tobytes()
+    return hashlib.sha1(data).hexdigest()[:16]
+
+# per-pixel sky coordinates of one camera calibration
+class sky_map:
+    def __init__(self, lens, alt, az):
+        self.lens = lens # class~calibration.lens_calibration the rasters were built from
+        self.alt = alt # (height, width) float32 altitude of every pixel in degrees
+        self.az = az # (height, width) float32 azimuth of every pixel in degrees
+        self.shape = alt.shape
+
+    def altaz(self, x, y):
+        """
+        (alt, az) in degrees of pixels (x, y), looked up from the rasters (nearest pixel)
+        """
+        ix = np.clip(np.rint(x).astype(int), 0, self.shape[1] - 1)
+        iy = np.clip(np.rint(y).astype(int), 0, self.shape[0] - 1)
+        return self.alt[iy, ix], self.az[iy, ix]
+
+    def xy(self, alt, az):
+        """
+        (x, y) pixel coordinates of a batch of sky positions (alt, az) in degrees
+        """
+        return self.lens.altaz2xy(alt, az)
+
+def build_sky_map(lens, shape, cache_dir=default_cache_dir, block_rows=256, stars=None):
+    """
+    alt & az of every pixel of a frame, as float32 rasters
+
+    the rasters are computed a block of rows at a time and saved as .npy files named after a
+    hash of the calibration, so later frames from the same camera just memory-map them
+
+    params
+    ------
+    lens : class~calibration.lens_calibration, or a zenith_finder result (which is first turned into
+        a lens calibration with calibration.calibrate, holding the zenith at the result's)
+    shape : (int, int), (height, width) of the frame in pixels
+    cache_dir : str, directory for the cached rasters (None keeps them in memory only)
+    block_rows : int, image rows computed at a time
+    stars : class~star_collection.catalog, the stars used when lens is a zenith_finder result
+
+    output
+    ------
+    class~sky_map
+    """
+    if not isinstance(lens, calibration.lens_calibration):
+        lens = calibration.calibrate(stars, zenith=list(lens), fix_zenith=True)
+    height, width = shape
+
+    if cache_dir is None:
+        alt = np.empty(shape, dtype=np.float32)
+        az = np.empty(shape, dtype=np.float32)
+    else:
+        key = calibration_key(lens, shape)
+        alt_path = os.path.join(cache_dir, f'{key}.alt.npy')
+        az_path = os.path.join(cache_dir, f'{key}.az.npy')
+        if os.path.exists(alt_path) and os.path.exists(az_path):
+            return sky_map(lens, np.load(alt_path, mmap_mode='r'), np.load(az_path, mmap_mode='r'))
+
+        # write under temporary names unique to this build, so an interrupted build never leaves a
+        # half-written map behind and processes building the same map don't write into each other's
+        os.makedirs(cache_dir, exist_ok=True)
+        parts = []
+        for path in (alt_path, az_path):
+            fd, part = tempfile.mkstemp(suffix='.part', prefix=os.path.basename(path) + '.', dir=cache_dir)
+            os.close(fd)
+            parts.append(part)
+        alt = np.lib.format.open_memmap(parts[0], mode='w+', dtype=np.float32, shape=shape)
+        az = np.lib.format.open_memmap(parts[1], mode='w+', dtype=np.float32, shape=shape)
+
+    x = np.arange(width, dtype=float)
+    for start in range(0, height, block_rows):
+        rows = np.arange(start, min(start + block_rows, height), dtype=float)
+        alt[start:start + len(rows)], az[start:start + len(rows)] = lens.xy2altaz(x[None, :], rows[:, None])
+
+    if cache_dir is None:
+        return sky_map(lens, alt, az)
+    alt.flush()
+    az.flush()
+    del alt, az
+    for part, path in zip(parts, (alt_path, az_path)):
+        try:
+            os.replace(part, path)
+        except OSError:
+            if not os.path.exists(path): # another build finishing first (with the same rasters) is fine
+                raise
+            os.remove(part)
+    return sky_map(lens, np.load(alt_path, mmap_mode='r'), np.load(az_path, mmap_mode='r'))
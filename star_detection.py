@@ -0,0 +1,159 @@
+# imports
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import star_collection
+
+def estimate_background(img, box=64, quantisation=None):
+    """
+    smooth background of an image: the median of each box x box tile, interpolated bilinearly
+    between tile centres
+
+    params
+    ------
+    img : 2-d array, the image (rows are y, columns are x)
+    box : int, tile size in pixels (larger than a star, smaller than the sky gradients)
+    quantisation : float, smallest noise level to report (defaults to the quantisation noise of one
+        count, 1/sqrt(12), for integer images and 0 otherwise)
+
+    output
+    ------
+    background : 2-d array, same shape as img
+    sigma : float, robust (median absolute deviation) noise of the image about the background
+        (which is 0 on integer images whose noise is below one count, hence the quantisation floor)
+    """
+    img = np.asarray(img)
+    if quantisation is None:
+        quantisation = 1/np.sqrt(12) if np.issubdtype(img.dtype, np.integer) else 0
+    img = img.astype(np.float32, copy=False)
+    height, width = img.shape
+    box = max(min(box, height, width), 1) # a crop smaller than a tile is one tile
+    ny, nx = max(height//box, 1), max(width//box, 1)
+    tiles = img[:ny*box, :nx*box].reshape(ny, box, nx, box).swapaxes(1, 2).reshape(ny, nx, -1)
+    grid = np.median(tiles, axis=-1)
+
+    # bilinear interpolation between the tile centres (clamped at the edges)
+    yc = (np.arange(ny) + 0.5)*box
+    xc = (np.arange(nx) + 0.5)*box
+    fy = np.interp(np.arange(height), yc, np.arange(ny))
+    fx = np.interp(np.arange(width), xc, np.arange(nx))
+    y0 = np.minimum(fy.astype(int), ny - 1)
+    x0 = np.minimum(fx.astype(int), nx - 1)
+    y1 = np.minimum(y0 + 1, ny - 1)
+    x1 = np.minimum(x0 + 1, nx - 1)
+    wy = (fy - y0)[:, None]
+    wx = (fx - x0)[None, :]
+    background = ((1 - wy)*((1 - wx)*grid[y0][:, x0] + wx*grid[y0][:, x1])
+                  + wy*((1 - wx)*grid[y1][:, x0] + wx*grid[y1][:, x1])).astype(np.float32)
+
+    residual = (img - background)[::4, ::4] # a subsample is plenty for the noise level
+    sigma = 1.4826*np.median(np.abs(residual - np.median(residual)))
+    return background, float(max(sigma, quantisation))
+
+def detect_stars(img, threshold=5, box=64, radius=3, max_stars=None):
+    """
+    find point sources in an all-sky image
+
+    1. the background is subtracted (see estimate_background)
+    2. pixels more than threshold x sigma above it that are the maximum of their neighbourhood are peaks
+    3. peaks within radius of each other are tied maxima of one star (a saturated core, or integer
+       camera data) and are merged
+    4. each peak is centroided to sub-pixel accuracy over a (2*radius + 1) square window
+
+    params
+    ------
+    img : 2-d array (or 3-d colour array, which is averaged over its channels)
+    threshold : float, detection threshold in units of the background noise
+    box : int, background tile size in pixels
+    radius : int, half-width in pixels of the peak neighbourhood and the centroid window
+    max_stars : int, keep only this many of the brightest detections
+
+    output
+    ------
+    dict of numpy columns {x, y, flux, peak}, brightest first
+    """
+    img = np.asarray(img)
+    quantisation = 1/np.sqrt(12) if np.issubdtype(img.dtype, np.integer) else 0
+    img = img.astype(np.float32, copy=False)
+    if img.ndim == 3:
+        img = img.mean(axis=-1)
+    background, sigma = estimate_background(img, box, quantisation)
+    residual = img - background
+    del background
+
+    # local maxima above the threshold (separable running max over the neighbourhood)
+    size = 2*radius + 1
+    padded = np.pad(residual, radius, mode='constant', constant_values=-np.inf)
+    local_max = sliding_window_view(padded, size, axis=0).max(axis=-1)
+    local_max = sliding_window_view(local_max, size, axis=1).max(axis=-1)
+    peaks = (residual > threshold*max(sigma, np.finfo(np.float32).tiny)) & (residual == local_max)
+    del local_max
+    py, px = np.nonzero(peaks)
+
+    # two peaks within radius must tie (each is the maximum of a neighbourhood holding the other),
+    # so chains of them are one star: merge each chain into its mean pixel
+    if len(px) > 1:
+        from scipy.spatial import cKDTree
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        pairs = cKDTree(np.column_stack([px, py])).query_pairs(radius, p=np.inf, output_type='ndarray')
+        if len(pairs):
+            links = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(px), len(px)))
+            _, labels = connected_components(links, directed=False)
+            count = np.bincount(labels)
+            px = np.rint(np.bincount(labels, px)/count).astype(int)
+            py = np.rint(np.bincount(labels, py)/count).astype(int)
+
+    # sub-pixel centroids over a window around every peak at once
+    offsets = np.arange(-radius, radius + 1)
+    wy = np.clip(py[:, None, None] + offsets[None, :, None], 0, img.shape[0] - 1)
+    wx = np.clip(px[:, None, None] + offsets[None, None, :], 0, img.shape[1] - 1)
+    weights = np.maximum(residual[wy, wx], 0)
+    flux = weights.sum(axis=(1, 2))
+    flux_safe = np.where(flux > 0, flux, 1)
+    x = (weights*wx).sum(axis=(1, 2))/flux_safe
+    y = (weights*wy).sum(axis=(1, 2))/flux_safe
+
+    order = np.argsort(-flux, kind='stable')[:max_stars]
+    return {'x': x[order], 'y': y[order], 'flux': flux[order], 'peak': residual[py, px][order]}
+
+def match_catalog(detections, stars, lens, radius=10, shape=None):
+    """
+    match detections to the catalog stars predicted on the frame by a lens calibration
+
+    the detections go into a kd-tree and every predicted star looks up its nearest detection
+    (o(n log n) rather than all pairs); a detection claimed by several stars goes to the closest
+
+    params
+    ------
+    detections : dict {x, y, ...} from detect_stars
+    stars : class~star_collection.catalog with the alt/az of the frame (see catalog.at)
+    lens : class~calibration.lens_calibration of the camera (e.g. from an earlier frame)
+    radius : float, largest distance in pixels between a prediction and its detection
+    shape : (height, width), only predictions inside the frame are matched if given
+
+    output
+    ------
+    class~star_collection.catalog of the matched stars, with their detected (x, y), ready for
+    starpos/optimal_quadrant/zenith_finder
+    """
+    up = np.flatnonzero(stars.alt > 0)
+    px, py = lens.altaz2xy(stars.alt[up], stars.az[up])
+    if shape is not None:
+        inside = (px >= 0) & (px < shape[1]) & (py >= 0) & (py < shape[0])
+        up, px, py = up[inside], px[inside], py[inside]
+
+    from scipy.spatial import cKDTree
+    tree = cKDTree(np.column_stack([detections['x'], detections['y']]))
+    distance, nearest = tree.query(np.column_stack([px, py]), distance_upper_bound=radius)
+    found = np.isfinite(distance)
+    up, distance, nearest = up[found], distance[found], nearest[found]
+
+    # one star per detection: keep the closest claim
+    order = np.lexsort((distance, nearest))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = nearest[order][1:] != nearest[order][:-1]
+    keep = order[first]
+    rows, nearest = up[keep], nearest[keep]
+
+    return star_collection.catalog(stars.name[rows], detections['x'][nearest], detections['y'][nearest],
+                                   stars.alt[rows], stars.az[rows], stars.ra[rows], stars.dec[rows])
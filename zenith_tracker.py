@@ -0,0 +1,138 @@
+# imports
+from time import perf_counter
+import numpy as np
+import position_functions
+import star_collection
+
+# one frame's estimate from a zenith_tracker
+class tracked_zenith:
+    def __init__(self, frame, result, refound, step, drift, mean_step, std_step, seconds):
+        self.frame = frame # index of the frame in the stream
+        self.result = result # class~position_functions.zenith_result of the solve
+        self.zenith = result.zenith # [x, y] in pixels
+        self.chisq = result.chisq[-1]
+        self.reduced_chisq = result.reduced_chisq # chisquare per degree of freedom (what the jump test uses)
+        self.refound = refound # True if this frame needed a full-image search
+        self.step = step # pixels moved since the previous frame
+        self.drift = drift # pixels moved since the first frame
+        self.mean_step = mean_step # mean and standard deviation of the steps so far
+        self.std_step = std_step
+        self.seconds = seconds # wall time of the solve
+
+    def __repr__(self):
+        return f'tracked_zenith(frame={self.frame}, zenith=[{self.zenith[0]:.3f}, {self.zenith[1]:.3f}], chisq={self.chisq:.4f}, step={self.step:.3f}, drift={self.drift:.3f}, refound={self.refound}, seconds={self.seconds:.4f})'
+
+class zenith_tracker:
+    """
+    follow the zenith through a stream of frames from a camera that barely moves
+
+    each frame is solved in a small window around the previous zenith, warm-started from the
+    previous fit; a full-image search is only run for the first frame and when the reduced
+    chisquare jumps (a bumped mount) or the zenith runs into the edge of the window
+    (the reduced chisquare, per degree of freedom, doesn't grow as clouds clear and more stars
+    are measured)
+
+    params
+    ------
+    initial_image : class~position_functions.area, the full image, searched for the first frame and after a jump
+    window : float, half-width in pixels of the area searched around the previous zenith
+    tol : float, pixel tolerance of each solve
+    jump : float, refind the zenith when a frame's reduced chisquare exceeds this many times the median of recent frames
+    history : int, number of recent frames the reduced chisquare median is taken over
+    site : (lat, lon), observer position, for frames given with a time
+    method : str, zenith_finder method ('quadrant' or 'direct')
+    """
+    def __init__(self, initial_image, window=16, tol=0.01, jump=3.0, history=25, site=None, method='quadrant'):
+        self.initial_image = initial_image
+        self.window = window
+        self.tol = tol
+        self.jump = jump
+        self.history = history
+        self.site = site
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        """
+        forget the previous frames, so the next one is searched over the whole image
+        """
+        self.frames = 0
+        self.first = None
+        self.last = None
+        self.recent_chisq = []
+        self.refinds = 0
+        self._steps = [0, 0.0, 0.0] # count, mean & sum of squared differences of the steps (welford)
+
+    def _solve(self, search_area, stars):
+        return position_functions.zenith_finder(search_area, visualise=False, stars=stars, tol=self.tol, method=self.method)
+
+    def update(self, stars=None, time=None):
+        """
+        solve one frame
+
+        params
+        ------
+        stars : class~star_collection.catalog measured on the frame (defaults to the 20220620 collection)
+        time : utc time of the frame, to place the stars with their ra/dec (needs the tracker's site)
+
+        output
+        ------
+        class~tracked_zenith
+        """
+        start = perf_counter()
+        stars = star_collection.frame_stars(stars, time, self.site)
+
+        refound = self.last is None
+        if refound:
+            result = self._solve(self.initial_image, stars)
+        else:
+            x, y = self.last.zenith
+            search_area = position_functions.area(x - self.window, x + self.window, y - self.window, y + self.window)
+            search_area.popt = self.last.popt
+            result = self._solve(search_area, stars)
+            # a jump in the reduced chisquare, or a zenith pushed against the window, means the camera moved
+            edge = max(abs(result.zenith[0] - x), abs(result.zenith[1] - y)) > self.window - 2*max(self.tol, 0.5)
+            if edge or result.reduced_chisq > self.jump*np.median(self.recent_chisq):
+                result = self._solve(self.initial_image, stars)
+                refound = True
+                self.refinds += 1
+                self.recent_chisq = []
+
+        # drift statistics
+        step = 0.0 if self.last is None else float(np.hypot(*np.subtract(result.zenith, self.last.zenith)))
+        if self.first is None:
+            self.first = result
+        else:
+            n, mean, m2 = self._steps
+            n += 1
+            delta = step - mean
+            mean += delta/n
+            m2 += delta*(step - mean)
+            self._steps = [n, mean, m2]
+        drift = float(np.hypot(*np.subtract(result.zenith, self.first.zenith)))
+        n, mean, m2 = self._steps
+        std = float(np.sqrt(m2/(n - 1))) if n > 1 else 0.0
+
+        self.recent_chisq = (self.recent_chisq + [result.reduced_chisq])[-self.history:]
+        self.last = result
+        tracked = tracked_zenith(self.frames, result, refound, step, drift, mean, std, perf_counter() - start)
+        self.frames += 1
+        return tracked
+
+    def track(self, frames):
+        """
+        solve a stream of frames, e.g. a generator or iter(queue.get, None)
+
+        params
+        ------
+        frames : iterable of class~star_collection.catalog, or of (catalog, utc time) pairs
+
+        output
+        ------
+        generator of class~tracked_zenith, one per frame as soon as it is solved
+        """
+        for frame in frames:
+            if isinstance(frame, tuple):
+                yield self.update(*frame)
+            else:
+                yield self.update(frame)